@@ -0,0 +1,119 @@
+"""Micro-benchmark of the JSX translator's attribute rendering.
+
+Times the table cell and internal reference visitors on a 1000x100 table
+(100k cells) and 20k internal links, calling the visitors directly so docutils
+traversal and the inherited HTML5 visitors are left out. Also compares the
+chained ``str.replace`` calls of ``_escape_attr`` with a single-pass
+``str.translate``.
+
+Run it from the repository root, on the trees to compare (e.g. before and after
+a translator change, using ``git stash`` or ``git checkout``)::
+
+    python benchmarks/translator_attrs.py --repeat 25
+"""
+
+import argparse
+import time
+import types
+from typing import Any, Callable
+
+from docutils import nodes
+
+from jsx_builder.translator import JSXTranslator
+
+ROWS = 1000
+COLS = 100
+LINKS = 20_000
+
+ESCAPE_TABLE = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+
+def make_cells() -> list[nodes.entry]:
+    """Return the cells of a ROWS x COLS table body."""
+    tgroup = nodes.tgroup()
+    tbody = nodes.tbody()
+    tgroup += tbody
+    cells = []
+    for _ in range(ROWS):
+        row = nodes.row()
+        tbody += row
+        for _ in range(COLS):
+            entry = nodes.entry()
+            row += entry
+            cells.append(entry)
+    return cells
+
+
+def make_links() -> list[nodes.reference]:
+    """Return internal references, every other one to an anchor with classes."""
+    links = []
+    for i in range(LINKS):
+        if i % 2:
+            links.append(nodes.reference('', '', internal=True, refuri=f'other/#deep-{i % 50}',
+                                         classes=['reference', 'internal']))
+        else:
+            links.append(nodes.reference('', '', internal=True, refuri='other/'))
+    return links
+
+
+def make_translator() -> Any:
+    """Return a stand-in for the translator state the visitors touch."""
+    builder = types.SimpleNamespace(resolve_link=lambda href: ('other', href.partition('#')[2]))
+    return types.SimpleNamespace(body=[], context=[], jsx_components_used=set(), builder=builder)
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Return the best wall time of ``func`` in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def visit_all(visitor: Callable[[Any, nodes.Element], None], elements: list[Any]) -> Callable[[], None]:
+    """Return a callable running ``visitor`` over all elements on a fresh translator."""
+    def run() -> None:
+        translator = make_translator()
+        for element in elements:
+            visitor(translator, element)
+    return run
+
+
+def escape_replace(text: str) -> str:
+    """Escape like ``JSXTranslator._escape_attr``."""
+    return JSXTranslator._escape_attr(None, text)  # type: ignore[arg-type]
+
+
+def escape_translate(text: str) -> str:
+    """Escape in a single pass with ``str.translate``."""
+    return text.translate(ESCAPE_TABLE)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks and print the best time of each."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--repeat', type=int, default=7, help='runs per benchmark, the best is reported')
+    args = parser.parse_args(argv)
+
+    cells = make_cells()
+    links = make_links()
+    print(f"visit_entry      {best_of(args.repeat, visit_all(JSXTranslator.visit_entry, cells)):8.1f} ms"
+          f"  ({len(cells)} cells)")
+    print(f"visit_reference  {best_of(args.repeat, visit_all(JSXTranslator.visit_reference, links)):8.1f} ms"
+          f"  ({len(links)} links)")
+
+    title = 'Installing the "jsx" builder\tfrom source'
+    long_text = title * 200
+    assert escape_replace(title) == escape_translate(title)
+    for label, text, loops in (('title', title, 100_000), ('long', long_text, 1_000)):
+        for name, escape in (('replace', escape_replace), ('translate', escape_translate)):
+            elapsed = best_of(args.repeat, lambda: [escape(text) for _ in range(loops)])
+            print(f"_escape_attr {name:<9} {label:<5} {elapsed * 1000 / loops:8.2f} us"
+                  f"  ({len(text)} chars)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
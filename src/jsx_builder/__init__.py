@@ -13,6 +13,10 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     """Set up the JSX builder extension."""
     app.add_builder(JSXBuilder)
     app.add_builder(JSONJSXBuilder)
+    app.add_config_value('jsx_chapter_bundles', False, 'html', bool)
+    app.add_config_value('jsx_bundle_max_size', 512 * 1024, 'html', int)
+    app.add_config_value('jsx_deterministic', False, 'html', bool)
+    app.add_config_value('jsx_compact', False, 'html', bool)
     return {"version": __version__, "parallel_read_safe": True}
 
 
@@ -0,0 +1,228 @@
+"""Batch driver building many JSX doc sets on a pool of warm worker processes."""
+
+import argparse
+import importlib
+import io
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from os import path
+from typing import IO, Any, Iterable
+
+from jsx_builder.builders import JsxOutputImplementation, SphinxJSONEncoder
+
+# plain logging, run_batch runs outside of any Sphinx application
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """A doc set to build, its output goes to ``outdir`` or ``<batch outdir>/<doc_id>``."""
+
+    srcdir: str
+    doc_id: Any
+    outdir: str | None = None
+    confoverrides: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single job."""
+
+    srcdir: str
+    doc_id: Any
+    outdir: str
+    duration: float
+    warnings: str = ''
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the build succeeded."""
+        return self.error is None
+
+
+class ForwardingImplementation(JsxOutputImplementation):
+    """Output implementation of a worker, forwarding calls to the shared implementation.
+
+    Serialization stays in the worker, all other calls are sent to the parent
+    process as JSON compatible data.
+    """
+
+    def __init__(self, calls: 'queue.Queue[tuple[str, Any, dict[str, Any]]]',
+                 local: JsxOutputImplementation) -> None:
+        """Initialize the implementation with the parent's call queue."""
+        self.calls = calls
+        self.local = local
+
+    def _forward(self, method: str, obj: Any, kwds: dict[str, Any]) -> None:
+        obj = json.loads(json.dumps(obj, cls=SphinxJSONEncoder))
+        kwds = json.loads(json.dumps(kwds, cls=SphinxJSONEncoder))
+        self.calls.put((method, obj, kwds))
+
+    def dump(self, obj: Any, file: Any, *args: Any, **kwds: Any) -> None:
+        self.local.dump(obj, file, *args, **kwds)
+
+    def createPage(self, obj: Any, *args: Any, **kwds: Any) -> None:
+        self._forward('createPage', obj, kwds)
+
+    def createAsset(self, obj: Any, *args: Any, **kwds: Any) -> None:
+        self._forward('createAsset', obj, kwds)
+
+    def createSection(self, obj: Any, *args: Any, **kwds: Any) -> None:
+        self._forward('createSection', obj, kwds)
+
+    def finalize(self, obj: Any, *args: Any, **kwds: Any) -> None:
+        self._forward('finalize', obj, kwds)
+
+
+def _warm_worker() -> None:
+    """Pay interpreter, Sphinx and extension startup once per worker process."""
+    import sphinx.application  # noqa: F401
+    import sphinx.builders.html  # noqa: F401
+    import sphinx.writers.html5  # noqa: F401
+
+    import jsx_builder  # noqa: F401
+
+
+def _build_job(job: BatchJob, outdir: str, buildername: str,
+               calls: 'queue.Queue[tuple[str, Any, dict[str, Any]]] | None') -> BatchResult:
+    """Build a single job inside a worker process."""
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    warning = io.StringIO()
+    started = time.perf_counter()
+    try:
+        # every job gets a clean docutils registry, like a fresh sphinx-build
+        with patch_docutils(job.srcdir), docutils_namespace():
+            app = Sphinx(job.srcdir, job.srcdir, outdir, path.join(outdir, '.doctrees'),
+                         buildername, confoverrides=job.confoverrides,
+                         status=None, warning=warning)
+            app.builder.doc_id = job.doc_id
+            if calls is not None:
+                app.builder.implementation = ForwardingImplementation(
+                    calls, app.builder.implementation)
+            app.build()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return BatchResult(job.srcdir, job.doc_id, outdir, time.perf_counter() - started,
+                       warning.getvalue(), error)
+
+
+def run_batch(jobs: Iterable[BatchJob | tuple[str, Any]], outdir: str,
+              implementation: JsxOutputImplementation | None = None, *,
+              buildername: str = 'jjson', max_workers: int | None = None) -> list[BatchResult]:
+    """Build all jobs on a process pool and feed one shared output implementation.
+
+    Worker processes are started once and reused for all jobs. The calls the
+    builders make on their output implementation are replayed on
+    ``implementation`` in the parent process, in order per job. Without an
+    implementation every builder uses its own.
+
+    Returns:
+        The results in the order of ``jobs``.
+
+    Raises:
+        ValueError: If two jobs would build into the same output directory.
+    """
+    jobs = [job if isinstance(job, BatchJob) else BatchJob(*job) for job in jobs]
+    if not jobs:
+        return []
+
+    # concurrent builds into one directory would share and corrupt the doctree cache
+    outdirs: dict[str, BatchJob] = {}
+    for job in jobs:
+        job_outdir = path.abspath(job.outdir or path.join(outdir, str(job.doc_id)))
+        if job_outdir in outdirs:
+            raise ValueError(f"Jobs {outdirs[job_outdir].srcdir} (docId {outdirs[job_outdir].doc_id}) "
+                             f"and {job.srcdir} (docId {job.doc_id}) both build into {job_outdir}")
+        outdirs[job_outdir] = job
+
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_worker) as pool:
+        calls = manager.Queue() if implementation is not None else None
+
+        futures: dict[Future[BatchResult], int] = {}
+        for index, (job_outdir, job) in enumerate(outdirs.items()):
+            futures[pool.submit(_build_job, job, job_outdir, buildername, calls)] = index
+
+        def replay() -> None:
+            if calls is None:
+                return
+            while True:
+                try:
+                    method, obj, kwds = calls.get_nowait()
+                except queue.Empty:
+                    return
+                getattr(implementation, method)(obj=obj, **kwds)
+
+        results: list[BatchResult | None] = [None] * len(jobs)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[futures[future]] = result
+                logger.info(f"Built {result.srcdir} (docId {result.doc_id}) in {result.duration:.2f}s")
+            replay()
+        replay()
+
+    return [result for result in results if result is not None]
+
+
+def load_implementation(spec: str) -> JsxOutputImplementation:
+    """Load an output implementation from ``module:attr``, classes are instantiated."""
+    module_name, _, attr = spec.partition(':')
+    if not module_name or not attr:
+        raise ValueError(f"Expected 'module:attr', got {spec!r}")
+    obj = importlib.import_module(module_name)
+    for name in attr.split('.'):
+        obj = getattr(obj, name)
+    return obj() if isinstance(obj, type) else obj
+
+
+def main(argv: list[str] | None = None, stdout: IO[str] | None = None) -> int:
+    """Run a batch build from the command line and report the time per project."""
+    stdout = stdout or sys.stdout
+    parser = argparse.ArgumentParser(
+        prog='jsx-builder-batch',
+        description='Build many doc sets on a pool of warm worker processes.')
+    parser.add_argument('outdir')
+    parser.add_argument('--job', nargs=2, action='append', metavar=('SRCDIR', 'DOCID'),
+                        required=True, help='source directory and docId of a doc set')
+    parser.add_argument('-b', '--builder', default='jjson')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--implementation', default=None, metavar='MODULE:ATTR',
+                        help='shared output implementation fed by all jobs, '
+                             'by default every job uses its own')
+    args = parser.parse_args(argv)
+
+    implementation = None
+    if args.implementation:
+        try:
+            implementation = load_implementation(args.implementation)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"cannot load implementation {args.implementation!r}: {e}")
+
+    started = time.perf_counter()
+    try:
+        results = run_batch([BatchJob(srcdir, doc_id) for srcdir, doc_id in args.job], args.outdir,
+                            implementation, buildername=args.builder, max_workers=args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    for result in results:
+        status = 'ok' if result.ok else f'failed: {result.error}'
+        stdout.write(f'{result.doc_id}\t{result.duration:8.2f}s\t{result.srcdir}\t{status}\n')
+    stdout.write(f'total\t{time.perf_counter() - started:8.2f}s\n')
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
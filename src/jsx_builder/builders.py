@@ -3,15 +3,18 @@
 import logging
 import os
 import re
+import shutil
 import types
 from os import path
 from pathlib import Path
 from typing import IO, TYPE_CHECKING , Any, Protocol
+from urllib.parse import urljoin
 
 import json
 
 from collections import UserString
 
+from docutils import nodes
 from sphinx.application import ENV_PICKLE_FILENAME, Sphinx
 from sphinx.builders.html import BuildInfo, StandaloneHTMLBuilder
 from sphinx.util import logging as sphinx_logging
@@ -20,7 +23,8 @@ from sphinx.util.osutil import SEP, copyfile, ensuredir, os_path
 
 from jsx_builder import jsxfileimpl
 
-from jsx_builder.translator import JSXTranslator
+from jsx_builder.sections import build_section_index, section_hash
+from jsx_builder.translator import JSXTranslator, collapse_whitespace
 
 class JsxOutputImplementation(Protocol):
         def createPage(self, obj: Any, *args: Any, **kwds: Any) -> None: ...
@@ -34,6 +38,12 @@ logger = sphinx_logging.getLogger(__name__)
 
 LAST_BUILD_FILENAME = 'last_build'
 
+# context values depending on the build machine or time, dropped in deterministic mode
+VOLATILE_CONTEXT_KEYS = (
+    'last_updated', 'sphinx_version', 'sphinx_version_tuple', 'docutils_version_info',
+    'alabaster_version', 'alabaster_version_info',
+)
+
 class JSXBuilder(StandaloneHTMLBuilder):
     """Abstract JSX Builder for Sphinx - generates JSX-compatible HTML with React components."""
 
@@ -46,6 +56,9 @@ class JSXBuilder(StandaloneHTMLBuilder):
 
     implementation_dumps_unicode = False
 
+    # docId passed to the output implementation, overrides ``django['docId']``
+    doc_id: Any = None
+
     # Use JSX translator to generate JSX components directly
     default_translator_class = JSXTranslator
 
@@ -67,25 +80,150 @@ class JSXBuilder(StandaloneHTMLBuilder):
             'col', 'embed', 'source', 'track', 'wbr'
         }
 
+        self.section_docnames: dict[str, str] = {}
+        self.link_anchors: dict[str, str | None] = {}
+        self.uri_docnames: dict[str, str] = {}
+        self.captured_pages: dict[str, dict[str, Any]] | None = None
+
+    def get_doc_id(self) -> Any:
+        """Return the docId passed to the output implementation."""
+        if self.doc_id is not None:
+            return self.doc_id
+        django_cfg = getattr(self.config, 'django', None)
+        return django_cfg.get('docId', None) if isinstance(django_cfg, dict) else None
+
     def get_target_uri(self, docname: str, typ: str | None = None) -> str:
         if docname == 'index':
             return ''
         if docname.endswith(SEP + 'index'):
             return docname[:-5]  # up to sep
         return docname + SEP
-    
-    def dump_context(self, context: dict[str, Any], filename: str | os.PathLike[str]) -> None:
+
+    def prepare_writing(self, docnames: set[str]) -> None:
+        super().prepare_writing(docnames)
+        keep = set(self.env.all_docs) - set(docnames)
+        # global section hash -> docname index, entries of rebuilt docs are refilled
+        self.section_docnames = {
+            hash_: docname
+            for hash_, docname in self.load_index(self.sectionindex_filename).items()
+            if docname in keep
+        }
+        # global "docname#anchor" -> section hash map, likewise
+        self.link_anchors = {
+            anchor: hash_
+            for anchor, hash_ in self.load_index(self.linkmap_filename).get('anchors', {}).items()
+            if anchor.split('#', 1)[0] in keep
+        }
+        self.uri_docnames = {self.get_target_uri(docname): docname
+                             for docname in self.env.found_docs}
+
+    def write_doc_serialized(self, docname: str, doctree: nodes.document) -> None:
+        super().write_doc_serialized(docname, doctree)
+        hashes: dict[int, str] = {}
+        for section in doctree.findall(nodes.section):
+            hashes[id(section)] = section_hash(section, docname)
+            self.section_docnames.setdefault(hashes[id(section)], docname)
+
+        for node in doctree.findall(nodes.Element):
+            if not node.get('ids'):
+                continue
+            # anchors outside of any section only resolve to the page itself
+            section = node
+            while section is not None and not isinstance(section, nodes.section):
+                section = section.parent
+            hash_ = hashes[id(section)] if section is not None else None
+            for anchor in node['ids']:
+                self.link_anchors[f'{docname}#{anchor}'] = hash_
+
+    def render_doc(self, docname: str) -> dict[str, Any]:
+        """Render a single document and return its page context without writing it.
+
+        :meth:`prepare_writing` must have been called before.
+        """
+        doctree = self.env.get_and_resolve_doctree(docname, self)
+        self.captured_pages = {}
+        try:
+            self.write_doc_serialized(docname, doctree)
+            self.write_doc(docname, doctree)
+            return self.captured_pages[docname]
+        finally:
+            self.captured_pages = None
+
+    def resolve_link(self, refuri: str) -> tuple[str, str] | None:
+        """Resolve a link on the current page to the docname and anchor it points to."""
+        uri, _, anchor = refuri.partition('#')
+        if not uri:
+            return self.current_docname, anchor
+        target = urljoin('/' + self.get_target_uri(self.current_docname), uri)[1:]
+        docname = self.uri_docnames.get(target)
+        if docname is None:
+            return None
+        return docname, anchor
+
+    def load_index(self, filename: str) -> dict[str, Any]:
+        """Load an index written by a previous build, or an empty one."""
+        try:
+            with open(path.join(self.outdir, filename), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def dump_index(self, index: dict[str, Any], filename: str) -> None:
+        """Dump an index to the output directory."""
+        indexfn = path.join(self.outdir, filename)
+        # first write to a temporary file, so that if dumping fails,
+        # the existing index won't be overwritten
+        if self.implementation_dumps_unicode:
+            with open(indexfn + '.tmp', 'w', encoding='utf-8') as ft:
+                self.implementation.dump(index, ft, *self.additional_dump_args, **self.dump_kwargs())
+        else:
+            with open(indexfn + '.tmp', 'wb') as fb:
+                self.implementation.dump(index, fb, *self.additional_dump_args, **self.dump_kwargs())
+        os.replace(indexfn + '.tmp', indexfn)
+
+    def dump_kwargs(self) -> dict[str, Any]:
+        """Return the keyword arguments passed to the implementation's dump."""
+        if not self.config.jsx_deterministic:
+            return {}
+        # canonical encoding: sorted keys, no insignificant whitespace, unescaped unicode
+        return {'sort_keys': True, 'separators': (',', ':'), 'ensure_ascii': False}
+
+    def output_source(self, source: str) -> str:
+        """Return a source path as written to the output."""
+        if not self.config.jsx_deterministic:
+            return source
+        return path.relpath(source, self.srcdir).replace(os.sep, '/')
+
+    def serializable_context(self, context: dict[str, Any]) -> dict[str, Any]:
+        """Return a copy of the context with asset objects replaced by their filenames."""
         context = context.copy()
+        if self.config.jsx_deterministic:
+            for key in VOLATILE_CONTEXT_KEYS:
+                context.pop(key, None)
         if 'css_files' in context:
             context['css_files'] = [css.filename for css in context['css_files']]
         if 'script_files' in context:
             context['script_files'] = [js.filename for js in context['script_files']]
+        return context
+
+    def dump_context(self, context: dict[str, Any], filename: str | os.PathLike[str]) -> None:
+        context = self.serializable_context(context)
         if self.implementation_dumps_unicode:
             with open(filename, 'w', encoding='utf-8') as ft:
-                self.implementation.dump(context, ft, *self.additional_dump_args)
+                self.implementation.dump(context, ft, *self.additional_dump_args, **self.dump_kwargs())
         else:
             with open(filename, 'wb') as fb:
-                self.implementation.dump(context, fb, *self.additional_dump_args)
+                self.implementation.dump(context, fb, *self.additional_dump_args, **self.dump_kwargs())
+
+    def compact_sections(self, ctx: dict[str, Any]) -> None:
+        """Intern section sources into a per-page table and collapse section bodies."""
+        sources: dict[str, int] = {}
+        for section in ctx['section_list']:
+            if section['source'] is not None:
+                section['source'] = sources.setdefault(section['source'], len(sources))
+            section['body'] = collapse_whitespace(section['body'])
+        ctx['section_sources'] = list(sources)
 
     def handle_page(self, pagename: str, ctx: dict[str, Any], templatename: str = 'page.html',
                     outfilename: str | None = None, event_arg: Any = None) -> None:
@@ -99,22 +237,34 @@ class JSXBuilder(StandaloneHTMLBuilder):
 
         self.app.emit('html-page-context', pagename, templatename, ctx, event_arg)
 
-        # Add section tree to context if available from the translator
-        if hasattr(self, 'docwriter') and hasattr(self.docwriter, 'visitor'):
+        # Add section tree to context if available from the translator, only for the
+        # document just written - genindex, search etc. would pick up a stale visitor
+        if (pagename == self.current_docname and pagename in self.env.all_docs
+                and hasattr(self, 'docwriter') and hasattr(self.docwriter, 'visitor')):
             visitor = self.docwriter.visitor
             if hasattr(visitor, 'section_list'):
-                ctx['section_list'] = visitor.section_list
+                ctx['section_list'] = [section.to_dict() for section in visitor.section_list]
+                ctx['section_index'] = build_section_index(visitor.section_list)
+                if self.config.jsx_compact:
+                    self.compact_sections(ctx)
+
+        if self.config.jsx_compact and isinstance(ctx.get('body'), str):
+            ctx['body'] = collapse_whitespace(ctx['body'])
 
         # make context object serializable
         for key in list(ctx):
             if isinstance(ctx[key], types.FunctionType):
                 del ctx[key]
 
+        # rendering on demand, hand the context back instead of writing it
+        if self.captured_pages is not None:
+            self.captured_pages[pagename] = self.serializable_context(ctx)
+            return
+
         ensuredir(path.dirname(outfilename))
         self.dump_context(ctx, outfilename)
 
-        django_cfg = getattr(self.config, 'django', None)
-        DocId = django_cfg.get('docId', None) if isinstance(django_cfg, dict) else None
+        DocId = self.get_doc_id()
 
         self.implementation.createPage(obj=ctx, docId=DocId, outDir=self.outdir)
 
@@ -130,8 +280,7 @@ class JSXBuilder(StandaloneHTMLBuilder):
         outfilename = path.join(self.outdir, self.globalcontext_filename)
         self.dump_context(self.globalcontext, outfilename)
 
-        django_cfg = getattr(self.config, 'django', None)
-        DocId = django_cfg.get('docId', None) if isinstance(django_cfg, dict) else None
+        DocId = self.get_doc_id()
 
                 # make context object serializable
         for key in list(self.globalcontext):
@@ -140,6 +289,25 @@ class JSXBuilder(StandaloneHTMLBuilder):
 
         self.implementation.finalize(obj=self.globalcontext, outDir=self.outdir, docId=DocId)
 
+        # drop sections of documents removed since the last build
+        all_docs = set(self.env.all_docs)
+        self.dump_index({hash_: docname for hash_, docname in self.section_docnames.items()
+                         if docname in all_docs}, self.sectionindex_filename)
+
+        # link map from every anchor and label to its page and section
+        labels = self.env.get_domain('std').labels  # type: ignore[attr-defined]
+        self.dump_index({
+            'docs': {docname: self.get_target_uri(docname) for docname in sorted(all_docs)},
+            'anchors': {anchor: hash_ for anchor, hash_ in self.link_anchors.items()
+                        if anchor.split('#', 1)[0] in all_docs},
+            'labels': {name: f'{docname}#{labelid}'
+                       for name, (docname, labelid, _sectname) in labels.items()
+                       if docname in all_docs},
+        }, self.linkmap_filename)
+
+        if self.config.jsx_chapter_bundles:
+            self.write_chapter_bundles()
+
         # super here to dump the search index
         super().handle_finish()
 
@@ -155,6 +323,87 @@ class JSXBuilder(StandaloneHTMLBuilder):
                 
         logger.info("JSX HTML build complete!")
 
+    def get_chapters(self) -> dict[str, list[str]]:
+        """Group documents by top-level toctree entry of the root document.
+
+        Each chapter lists its documents in toctree order, starting with the
+        chapter document itself. The root document and orphans are not part of
+        any chapter.
+        """
+        includes = self.env.toctree_includes
+        seen = {self.config.root_doc}
+        chapters: dict[str, list[str]] = {}
+
+        def collect(docname: str, docs: list[str]) -> None:
+            if docname in seen or docname not in self.env.all_docs:
+                return
+            seen.add(docname)
+            docs.append(docname)
+            for child in includes.get(docname, []):
+                collect(child, docs)
+
+        for chapter in includes.get(self.config.root_doc, []):
+            docs: list[str] = []
+            collect(chapter, docs)
+            if docs:
+                chapters[chapter] = docs
+        return chapters
+
+    def write_chapter_bundles(self) -> None:
+        """Write the pages of each chapter into bundles of limited size.
+
+        Chapters larger than ``jsx_bundle_max_size`` bytes are split into
+        consecutive bundles; a page larger than the limit gets a bundle of its
+        own. The manifest maps every bundled docname to its bundle.
+        """
+        max_size = self.config.jsx_bundle_max_size
+        bundledir = path.join(self.outdir, self.bundle_dirname)
+        shutil.rmtree(bundledir, ignore_errors=True)
+        ensuredir(bundledir)
+
+        bundles: dict[str, dict[str, Any]] = {}
+        docs: dict[str, str] = {}
+
+        taken: set[str] = set()
+
+        def flush(chapter: str, part: int, pages: dict[str, str], size: int) -> None:
+            base = chapter.replace(SEP, '-') + (f'-{part}' if part > 1 else '')
+            # "guide/intro" and "guide-intro" flatten alike, so do chapter "api-2" and part 2
+            # of "api" - suffix the later one (case-insensitive filesystems included)
+            name, dup = base, 1
+            while name.casefold() in taken:
+                dup += 1
+                name = f'{base}~{dup}'
+            taken.add(name.casefold())
+            # pages are already serialized, splice them in as they are
+            content = ','.join(f'{json.dumps(docname)}:{page}' for docname, page in pages.items())
+            with open(path.join(bundledir, name + '.json'), 'w', encoding='utf-8') as f:
+                f.write(f'{{"chapter":{json.dumps(chapter)},"pages":{{{content}}}}}')
+            bundles[name] = {'chapter': chapter, 'pages': list(pages), 'size': size}
+            docs.update(dict.fromkeys(pages, name))
+
+        for chapter, docnames in self.get_chapters().items():
+            pages: dict[str, str] = {}
+            size = 0
+            part = 1
+            for docname in docnames:
+                pagefn = path.join(self.outdir, os_path(docname) + self.out_suffix)
+                try:
+                    with open(pagefn, encoding='utf-8') as f:
+                        page = f.read()
+                except OSError:
+                    continue
+                page_size = len(page.encode('utf-8'))
+                if pages and size + page_size > max_size:
+                    flush(chapter, part, pages, size)
+                    pages, size, part = {}, 0, part + 1
+                pages[docname] = page
+                size += page_size
+            if pages:
+                flush(chapter, part, pages, size)
+
+        self.dump_index({'bundles': bundles, 'docs': docs}, self.bundlemanifest_filename)
+
     def _apply_jsx_attribute_fixes(self, html_file: Path):
         """Apply minimal JSX attribute fixes to HTML file."""
         try:
@@ -225,4 +474,8 @@ class JSONJSXBuilder(JSXBuilder):
     additional_dump_args: tuple[Any] = ()
     out_suffix = '.fjson'
     globalcontext_filename = 'globalcontext.json'
-    searchindex_filename = 'searchindex.json'
\ No newline at end of file
+    searchindex_filename = 'searchindex.json'
+    sectionindex_filename = 'sectionindex.json'
+    linkmap_filename = 'linkmap.json'
+    bundle_dirname = '_bundles'
+    bundlemanifest_filename = 'bundles.json'
\ No newline at end of file
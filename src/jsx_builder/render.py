@@ -0,0 +1,104 @@
+"""On-demand rendering of single documents from a built environment."""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from os import path
+from typing import IO, Any
+
+from sphinx.application import Sphinx
+from sphinx.util import logging as sphinx_logging
+from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+logger = sphinx_logging.getLogger(__name__)
+
+
+class DocumentRenderer:
+    """Render single documents of a built project through the JSX translator.
+
+    The Sphinx application and the pickled build environment are loaded once.
+    :meth:`render` returns the same page context the builder's ``handle_page``
+    serializes, and keeps the most recently used pages in an LRU cache keyed by
+    the modification time of their source. Sources edited after the environment
+    was built are re-read before rendering; other pages referring to them (e.g.
+    through toctrees) are not updated until the next full build.
+
+    The application lives in its own docutils namespace until :meth:`close`.
+    """
+
+    def __init__(self, srcdir: str, outdir: str, *, doctreedir: str | None = None,
+                 confdir: str | None = None, buildername: str = 'jjson',
+                 confoverrides: dict[str, Any] | None = None, maxsize: int = 256,
+                 status: IO[str] | None = None, warning: IO[str] | None = sys.stderr) -> None:
+        """Load the Sphinx application and the build environment."""
+        doctreedir = doctreedir or path.join(outdir, '.doctrees')
+        with ExitStack() as stack:
+            stack.enter_context(patch_docutils(confdir or srcdir))
+            stack.enter_context(docutils_namespace())
+            self.app = Sphinx(srcdir, confdir or srcdir, outdir, doctreedir, buildername,
+                              confoverrides=confoverrides, status=status, warning=warning)
+            self._stack = stack.pop_all()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, tuple[int, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.app.builder.prepare_writing(set())
+
+    @property
+    def env(self) -> Any:
+        """The build environment."""
+        return self.app.env
+
+    def source_mtime(self, docname: str) -> int:
+        """Return the modification time of a document source in microseconds."""
+        # rounded up like Sphinx's own outdated check, so both agree on stale sources
+        return -(os.stat(self.env.doc2path(docname)).st_mtime_ns // -1_000)
+
+    def render(self, docname: str) -> dict[str, Any]:
+        """Return the page context of a document, rendering it if needed.
+
+        The context is a shallow copy of the cached one, so callers may add or
+        replace keys. Nested values are shared with the cache and must not be
+        modified.
+        """
+        if docname not in self.env.all_docs:
+            raise ValueError(f"Unknown document {docname!r}")
+
+        with self._lock:
+            mtime = self.source_mtime(docname)
+            cached = self._cache.get(docname)
+            if cached is not None and cached[0] == mtime:
+                self.hits += 1
+                self._cache.move_to_end(docname)
+                return dict(cached[1])
+
+            self.misses += 1
+            if mtime > self.env.all_docs[docname]:
+                self.reread(docname)
+            ctx = self.app.builder.render_doc(docname)
+
+            self._cache[docname] = (mtime, ctx)
+            self._cache.move_to_end(docname)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+            return dict(ctx)
+
+    def reread(self, docname: str) -> None:
+        """Re-read a document whose source changed since the environment was built."""
+        logger.info(f"Re-reading outdated document {docname}")
+        self.app.events.emit('env-purge-doc', self.env, docname)
+        self.env.clear_doc(docname)
+        self.app.builder.read_doc(docname)
+
+    def cache_clear(self) -> None:
+        """Drop all cached pages."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Drop all cached pages and leave the docutils namespace of the application."""
+        self.cache_clear()
+        self._stack.close()
@@ -0,0 +1,82 @@
+"""Section records and lookup indexes for the JSX builder."""
+
+import hashlib
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from docutils import nodes
+from docutils.nodes import Element
+
+
+@dataclass(slots=True)
+class SectionRecord:
+    """Compact record of a rendered section.
+
+    ``parent`` and ``children`` hold positions in the page's ``section_list``,
+    so the section tree can be rebuilt without scanning the list.
+    """
+
+    id: str
+    title: str
+    level: int
+    secnumber: str
+    hash: str
+    source: str | None
+    startline: int | None
+    endline: int | None = None
+    body: str = ''
+    parent: int | None = None
+    children: list[int] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record as a JSON serializable dict."""
+        return asdict(self)
+
+
+def section_title(node: Element) -> str:
+    """Return the title text of a section node."""
+    for child in node.children:
+        if isinstance(child, nodes.title):
+            return child.astext()
+    return ''
+
+
+def section_hash(node: Element, docname: str) -> str:
+    """Generate a hash for the section based on structure and content.
+
+    The docname and section ids are part of the hash, so sections with the same
+    content on one page or across pages still get distinct hashes.
+    """
+    content_parts = [
+        f"doc:{docname}",
+        f"ids:{' '.join(node.get('ids', ()))}",
+        f"title:{section_title(node)}",
+    ]
+    for child in node.children:
+        # Exclude nested sections from the hash content to avoid dependency on children
+        if not isinstance(child, nodes.section):
+            # Create a signature including type, attributes, and content
+            # Sort attributes for deterministic hashing
+            child_attrs = sorted(
+                (k, str(v)) for k, v in child.attributes.items()
+                if k not in ('ids', 'names', 'dupnames', 'backrefs', 'source', 'line')
+            )
+            sig = f"[{child.tagname}]{child_attrs}:{child.astext()}"
+            content_parts.append(sig)
+
+    hash_content = "\n".join(content_parts)
+    return hashlib.sha1(hash_content.encode('utf-8')).hexdigest()
+
+
+def build_section_index(section_list: list[SectionRecord]) -> dict[str, Any]:
+    """Build the per-page lookup tables from id and hash to list position."""
+    roots: list[int] = []
+    by_id: dict[str, int] = {}
+    by_hash: dict[str, int] = {}
+    for pos, record in enumerate(section_list):
+        if record.parent is None:
+            roots.append(pos)
+        for ident in record.id.split():
+            by_id.setdefault(ident, pos)
+        by_hash.setdefault(record.hash, pos)
+    return {'roots': roots, 'by_id': by_id, 'by_hash': by_hash}
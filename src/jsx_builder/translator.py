@@ -2,15 +2,70 @@
 
 import logging
 import re
-import hashlib
+from functools import lru_cache
 from typing import Any
 
 from docutils import nodes
 from docutils.nodes import Element
 from sphinx.writers.html5 import HTML5Translator
 
+from jsx_builder.sections import SectionRecord, section_title
+from jsx_builder.sections import section_hash as compute_section_hash
+
 logger = logging.getLogger(__name__)
 
+# Block-level tags whitespace around which is insignificant
+BLOCK_TAGS = (
+    'p|div|ul|ol|li|dl|dt|dd|table|thead|tbody|tfoot|tr|th|td|colgroup|col|blockquote|'
+    'h[1-6]|section|figure|figcaption|hr|aside|nav|'
+    'Section|SectionRef|Table|TableHead|TableBody|TableFoot|TableRow|TableCell|Note'
+)
+PREFORMATTED_RE = re.compile(r'<(CodeBlock|pre|textarea)\b.*?</\1>', re.DOTALL)
+PLACEHOLDER_RE = re.compile(r'<\x00(\d+)>')
+BEFORE_BLOCK_RE = re.compile(rf'>\s+(?=</?(?:{BLOCK_TAGS}|\x00)\b)')
+AFTER_BLOCK_RE = re.compile(rf'(</?(?:{BLOCK_TAGS})\b[^>]*>|<\x00\d+>)\s+(?=<)')
+
+
+def collapse_whitespace(markup: str) -> str:
+    """Remove insignificant whitespace around block-level tags, keeping preformatted content."""
+    # set preformatted blocks aside, they stand in as block-level tags meanwhile
+    preformatted: list[str] = []
+
+    def stash(match: re.Match[str]) -> str:
+        preformatted.append(match.group(0))
+        return f'<\x00{len(preformatted) - 1}>'
+
+    markup = PREFORMATTED_RE.sub(stash, markup)
+    markup = BEFORE_BLOCK_RE.sub('>', markup)
+    markup = AFTER_BLOCK_RE.sub(r'\1', markup)
+    return PLACEHOLDER_RE.sub(lambda match: preformatted[int(match.group(1))], markup)
+
+
+# HTML attribute names and their JSX counterparts
+JSX_ATTR_NAMES = {
+    'class': 'className',
+    'for': 'htmlFor',
+    'tabindex': 'tabIndex',
+    'readonly': 'readOnly',
+    'maxlength': 'maxLength',
+    'cellpadding': 'cellPadding',
+    'cellspacing': 'cellSpacing',
+    'rowspan': 'rowSpan',
+    'colspan': 'colSpan',
+    'usemap': 'useMap',
+    'frameborder': 'frameBorder',
+}
+
+ADMONITION_TYPES = frozenset(('note', 'warning', 'tip', 'important', 'caution', 'danger', 'error'))
+
+
+@lru_cache(maxsize=1024)
+def class_name_attr(classes: tuple[str, ...]) -> str:
+    """Render the className attribute of a class list, class lists recur a lot."""
+    if not classes:
+        return ''
+    return f' className="{" ".join(classes)}"'
+
 
 class JSXTranslator(HTML5Translator):
     """JSX-specific HTML5 translator that outputs JSX-compatible HTML."""
@@ -24,9 +79,12 @@ class JSXTranslator(HTML5Translator):
         # Track JSX components used for import generation
         self.jsx_components_used = set()
         
+        # Compact output leaves section data to the section records
+        self.compact = getattr(self.config, 'jsx_compact', False)
+
         # Section tree tracking
-        self.section_list = []
-        self._section_stack = []
+        self.section_list: list[SectionRecord] = []
+        self._section_stack: list[tuple[SectionRecord, int]] = []
 
     def visit_section(self, node: Element) -> None:
         """Handle section start - add JSX Section component if needed."""
@@ -42,8 +100,11 @@ class JSXTranslator(HTML5Translator):
         
         attrs.append(f'level="{self.section_level}"')
 
-        if node.source:
-            attrs.append(f'source="{node.source}"')
+        source = node.source
+        if source and hasattr(self.builder, 'output_source'):
+            source = self.builder.output_source(source)
+        if source:
+            attrs.append(f'source="{source}"')
         
         if node.line:
             attrs.append(f'line="{node.line}"')
@@ -55,50 +116,27 @@ class JSXTranslator(HTML5Translator):
             secnumber_str = '.'.join(map(str, secnumber))
             attrs.append(f'secnumber="{secnumber_str}"')
         
-        # Get the title text if available
-        title_text = ''
-        for child in node.children:
-            if isinstance(child, nodes.title):
-                title_text = child.astext()
-                break
-        
-        # Generate hash for the section based on structure and content
-        content_parts = [f"title:{title_text}"]
-        for child in node.children:
-            # Exclude nested sections from the hash content to avoid dependency on children
-            if not isinstance(child, nodes.section):
-                # Create a signature including type, attributes, and content
-                # Sort attributes for deterministic hashing
-                child_attrs = sorted(
-                    (k, str(v)) for k, v in child.attributes.items() 
-                    if k not in ('ids', 'names', 'dupnames', 'backrefs', 'source', 'line')
-                )
-                sig = f"[{child.tagname}]{child_attrs}:{child.astext()}"
-                content_parts.append(sig)
-        
-        hash_content = "\n".join(content_parts)
-        section_hash = hashlib.sha1(hash_content.encode('utf-8')).hexdigest()
+        title_text = section_title(node)
+        section_hash = compute_section_hash(node, self.builder.current_docname)
         attrs.append(f'hash="{section_hash}"')
 
-        # Build tree node
-        section_node = {
-            'id': id_str,
-            'title': title_text,
-            'level': self.section_level,
-            'secnumber': secnumber_str,
-            'hash': section_hash,
-            'source': node.source,
-            'startline': node.line,
-            'children': []
-        }
-
-        # Push to stack
-        self._section_stack.append(section_node)
-        
+        # Build tree node and push to stack, remembering where its body starts
+        section_node = SectionRecord(
+            id=id_str,
+            title=title_text,
+            level=self.section_level,
+            secnumber=secnumber_str,
+            hash=section_hash,
+            source=source,
+            startline=node.line,
+        )
+        self._section_stack.append((section_node, len(self.body)))
+
         if title_text:
             attrs.append(f'title="{self._escape_attr(title_text)}"')
 
-        section_node['start_index'] = len(self.body)
+        if self.compact:
+            attrs = [f'hash="{section_hash}"']
         self.body.append(f'<Section {" ".join(attrs)}>')
         self.context.append('</Section>')
 
@@ -111,40 +149,32 @@ class JSXTranslator(HTML5Translator):
         
         # Capture section body content
         if self._section_stack:
-            section_node = self._section_stack.pop()
-            if 'start_index' in section_node:
-                start_idx = section_node['start_index']
-                # Capture the full content including wrapper
-                section_node['body'] = "".join(self.body[start_idx:])
-                if node.line:
-                    section_node['endline'] = node.line
-
-                del section_node['start_index']
-                
-                # Remove content from main body and replace with SectionRef
-                del self.body[start_idx:]
-                self.body.append(f'<SectionRef hash="{section_node["hash"]}" />')
-                
-                # Add to flat list
-                self.section_list.append(section_node)
-        
+            section_node, start_idx = self._section_stack.pop()
+            # Capture the full content including wrapper
+            section_node.body = "".join(self.body[start_idx:])
+            if node.line:
+                section_node.endline = node.line
+
+            # Remove content from main body and replace with SectionRef
+            del self.body[start_idx:]
+            self.body.append(f'<SectionRef hash="{section_node.hash}" />')
+
+            # Add to flat list; nested sections were departed first, so link them now
+            position = len(self.section_list)
+            for child_pos in section_node.children:
+                self.section_list[child_pos].parent = position
+            if self._section_stack:
+                self._section_stack[-1][0].children.append(position)
+            self.section_list.append(section_node)
+
     def visit_table(self, node: Element) -> None:
         """Handle table element - use JSX Table component."""
         self.jsx_components_used.add('Table')
-        # Extract table classes and attributes
-        classes = node.get('classes', [])
-        # Build JSX attributes
-        attrs = []
-        if classes:
-            class_str = ' '.join(classes)
-            attrs.append(f'className="{class_str}"')
-        # Add other table attributes (always quote values for JSX)
-        for attr in node.attributes:
-            if attr not in ['classes', 'ids']:
-                value = node.attributes[attr]
-                jsx_attr = self._html_attr_to_jsx(attr)
-                attrs.append(f'{jsx_attr}="{value}"')
-        attr_string = ' ' + ' '.join(attrs) if attrs else ''
+        # Add other table attributes after the classes (always quote values for JSX)
+        attr_string = class_name_attr(tuple(node.get('classes', ())))
+        for attr, value in node.attributes.items():
+            if attr not in ('classes', 'ids'):
+                attr_string += f' {self._html_attr_to_jsx(attr)}="{value}"'
         self.body.append(f'<Table{attr_string}>')
         self.context.append('</Table>')
 
@@ -185,17 +215,7 @@ class JSXTranslator(HTML5Translator):
     def visit_row(self, node: Element) -> None:
         """Handle table row - use JSX TableRow component."""
         self.jsx_components_used.add('TableRow')
-        
-        # Handle row attributes
-        attrs = []
-        classes = node.get('classes', [])
-        if classes:
-            class_str = ' '.join(classes)
-            attrs.append(f'className="{class_str}"')
-        
-        attr_string = ' ' + ' '.join(attrs) if attrs else ''
-        
-        self.body.append(f'<TableRow{attr_string}>')
+        self.body.append(f'<TableRow{class_name_attr(tuple(node.get("classes", ())))}>')
         self.context.append('</TableRow>')
 
     def depart_row(self, node: Element) -> None:
@@ -205,38 +225,32 @@ class JSXTranslator(HTML5Translator):
     def visit_entry(self, node: Element) -> None:
         """Handle table cell - use JSX TableCell component."""
         self.jsx_components_used.add('TableCell')
-        
+        attributes = node.attributes
+
         # Determine if header or data cell
         is_header = node.parent.parent.tagname == 'thead'
-        
-        # Handle cell attributes
-        attrs = []
-        classes = node.get('classes', [])
+
+        classes = attributes['classes']
         if is_header:
-            classes.append('header-cell')
-        
-        if classes:
-            class_str = ' '.join(classes)
-            attrs.append(f'className="{class_str}"')
-        
-        # Handle colspan and rowspan (always quote values for JSX)
-        if node.get('morecols'):
-            colspan = node['morecols'] + 1
-            attrs.append(f'colSpan="{colspan}"')
-        
-        if node.get('morerows'):
-            rowspan = node['morerows'] + 1
-            attrs.append(f'rowSpan="{rowspan}"')
-        
+            attr_string = class_name_attr((*classes, 'header-cell'))
+        else:
+            attr_string = class_name_attr(tuple(classes)) if classes else ''
+
+        # Handle colspan and rowspan
+        morecols = attributes.get('morecols')
+        if morecols:
+            attr_string += f' colSpan="{morecols + 1}"'
+        morerows = attributes.get('morerows')
+        if morerows:
+            attr_string += f' rowSpan="{morerows + 1}"'
+
         # Mark as header cell (always quote boolean for JSX)
         if is_header:
-            attrs.append('isHeader="true"')
+            attr_string += ' isHeader="true"'
 
         if node.line:
-            attrs.append(f'line="{node.line}"')
-        
-        attr_string = ' ' + ' '.join(attrs) if attrs else ''
-        
+            attr_string += f' line="{node.line}"'
+
         self.body.append(f'<TableCell{attr_string}>')
         self.context.append('</TableCell>')
 
@@ -246,25 +260,29 @@ class JSXTranslator(HTML5Translator):
 
     def visit_reference(self, node: Element) -> None:
         """Handle reference (link) - use JSX Link component for internal links."""
+        attributes = node.attributes
         # Check if this is an internal reference
-        if node.get('internal') or 'refuri' not in node:
+        if attributes.get('internal') or 'refuri' not in attributes:
             self.jsx_components_used.add('Link')
-            
-            # Build Link component attributes
-            attrs = []
-            
+
             # Handle href
-            href = node.get('refuri') or f"#{node.get('refid', '')}"
-            attrs.append(f'to="{href}"')
-            
-            # Handle classes
-            classes = node.get('classes', [])
+            href = attributes.get('refuri') or f"#{attributes.get('refid', '')}"
+            attr_string = f' to="{href}"'
+
+            # Handle resolved target, keys into the builder's link map. Not "target",
+            # which Link components forward to <a> as the browsing context name
+            if hasattr(self.builder, 'resolve_link'):
+                target = self.builder.resolve_link(href)
+                if target:
+                    docname, anchor = target
+                    attr_string += f' doc="{docname}"'
+                    if anchor:
+                        attr_string += f' anchor="{docname}#{anchor}"'
+
+            classes = attributes['classes']
             if classes:
-                class_str = ' '.join(classes)
-                attrs.append(f'className="{class_str}"')
-            
-            attr_string = ' ' + ' '.join(attrs) if attrs else ''
-            
+                attr_string += class_name_attr(tuple(classes))
+
             self.body.append(f'<Link{attr_string}>')
             self.context.append('</Link>')
         else:
@@ -281,27 +299,16 @@ class JSXTranslator(HTML5Translator):
     def visit_literal_block(self, node: Element) -> None:
         """Handle code blocks - use JSX CodeBlock component."""
         self.jsx_components_used.add('CodeBlock')
-        
-        # Extract language and other attributes
-        attrs = []
-        
+
         # Handle language
         language = node.get('language', '')
-        if language:
-            attrs.append(f'language="{language}"')
-        
-        # Handle classes
-        classes = node.get('classes', [])
-        if classes:
-            class_str = ' '.join(classes)
-            attrs.append(f'className="{class_str}"')
+        attr_string = f' language="{language}"' if language else ''
+        attr_string += class_name_attr(tuple(node.get('classes', ())))
         #if node.rawsource == node.astext():
             # Escape double quotes in text
         #    text = node.astext().replace('"', '\"')
         #    attrs.append(f'text="{text}"')
-        
-        attr_string = ' ' + ' '.join(attrs) if attrs else ''
-        
+
         self.body.append(f'<CodeBlock{attr_string}>')
         self.context.append('</CodeBlock>')
         #raise nodes.SkipNode  # Skip further processing since we handled content here
@@ -313,27 +320,18 @@ class JSXTranslator(HTML5Translator):
     def visit_admonition(self, node: Element, name: str = '') -> None:
         """Handle admonitions - use JSX Note component."""
         self.jsx_components_used.add('Note')
-        
+
         # Determine admonition type
         admonition_type = name or 'note'  # Use provided name or default
-        classes = node.get('classes', [])
-        
+        classes = tuple(node.get('classes', ()))
+
         # Override with class if found
         for cls in classes:
-            if cls in ['note', 'warning', 'tip', 'important', 'caution', 'danger', 'error']:
+            if cls in ADMONITION_TYPES:
                 admonition_type = cls
                 break
-        
-        # Build Note component attributes
-        attrs = [f'type="{admonition_type}"']
-        
-        if classes:
-            class_str = ' '.join(classes)
-            attrs.append(f'className="{class_str}"')
-        
-        attr_string = ' ' + ' '.join(attrs)
-        
-        self.body.append(f'<Note{attr_string}>')
+
+        self.body.append(f'<Note type="{admonition_type}"{class_name_attr(classes)}>')
         self.context.append('</Note>')
 
     def depart_admonition(self, node: Element, name: str = '') -> None:
@@ -382,22 +380,8 @@ class JSXTranslator(HTML5Translator):
 
     def _html_attr_to_jsx(self, attr_name: str) -> str:
         """Convert HTML attribute names to JSX format."""
-        conversions = {
-            'class': 'className',
-            'for': 'htmlFor',
-            'tabindex': 'tabIndex',
-            'readonly': 'readOnly',
-            'maxlength': 'maxLength',
-            'cellpadding': 'cellPadding',
-            'cellspacing': 'cellSpacing',
-            'rowspan': 'rowSpan',
-            'colspan': 'colSpan',
-            'usemap': 'useMap',
-            'frameborder': 'frameBorder',
-        }
-        
-        return conversions.get(attr_name.lower(), attr_name)
-    
+        return JSX_ATTR_NAMES.get(attr_name.lower(), attr_name)
+
     def _escape_attr(self, text: str) -> str:
         """Escape attribute values for JSX."""
         if not text:
@@ -0,0 +1,261 @@
+"""Watch mode for the JSX builder - keeps Sphinx warm and pushes change events."""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from typing import Any
+
+from docutils import nodes
+from sphinx.application import Sphinx
+from sphinx.util import logging as sphinx_logging
+from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+logger = sphinx_logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 15.0
+
+
+class WatchDaemon:
+    """Long-running builder that rebuilds changed documents in a warm environment.
+
+    The Sphinx application, its extensions and the build environment stay in
+    memory between builds, so an edit only costs reading and writing the
+    outdated documents. Every build publishes a change event with the
+    rebuilt docnames and their section hashes to the subscribers of the
+    server-sent events endpoint (``GET /events``).
+    """
+
+    def __init__(self, srcdir: str, outdir: str, *, doctreedir: str | None = None,
+                 buildername: str = 'jjson', confoverrides: dict[str, Any] | None = None,
+                 host: str = '127.0.0.1', port: int = 8765, interval: float = 0.2,
+                 quiet: bool = False) -> None:
+        """Initialize the daemon, nothing is built until :meth:`build` is called."""
+        self.srcdir = path.abspath(srcdir)
+        self.outdir = path.abspath(outdir)
+        self.doctreedir = path.abspath(doctreedir or path.join(outdir, '.doctrees'))
+        self.buildername = buildername
+        self.confoverrides = confoverrides or {}
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.quiet = quiet
+
+        self.app: Sphinx | None = None
+        self._app_stack: ExitStack | None = None
+        self.subscribers: list[queue.Queue[str]] = []
+        self._lock = threading.Lock()
+        self._written: set[str] = set()
+        self._snapshot: dict[str, float] = {}
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+
+    def create_app(self) -> Sphinx:
+        """Create the Sphinx application which is kept for all following builds.
+
+        Like ``sphinx-build``, the application lives in its own docutils
+        namespace, so recreating it does not re-register nodes and roles.
+        """
+        self.close_app()
+        with ExitStack() as stack:
+            stack.enter_context(patch_docutils(self.srcdir))
+            stack.enter_context(docutils_namespace())
+            app = Sphinx(self.srcdir, self.srcdir, self.outdir, self.doctreedir, self.buildername,
+                         confoverrides=self.confoverrides,
+                         status=None if self.quiet else sys.stdout, warning=sys.stderr)
+            app.connect('doctree-resolved', self._on_doctree_resolved)
+            self._app_stack = stack.pop_all()
+        self.app = app
+        return app
+
+    def close_app(self) -> None:
+        """Drop the Sphinx application and leave its docutils namespace."""
+        self.app = None
+        if self._app_stack is not None:
+            self._app_stack.close()
+            self._app_stack = None
+
+    def _on_doctree_resolved(self, app: Sphinx, doctree: nodes.document, docname: str) -> None:
+        self._written.add(docname)
+
+    def scan(self) -> dict[str, float]:
+        """Return the modification times of all files in the source tree."""
+        snapshot = {}
+        for dirpath, dirnames, filenames in os.walk(self.srcdir):
+            # skip hidden directories and build output inside the source tree
+            dirnames[:] = [
+                d for d in dirnames
+                if not d.startswith('.')
+                and path.join(dirpath, d) not in (self.outdir, self.doctreedir)
+            ]
+            for filename in filenames:
+                filepath = path.join(dirpath, filename)
+                try:
+                    snapshot[filepath] = os.stat(filepath).st_mtime
+                except OSError:
+                    continue
+        return snapshot
+
+    def build(self) -> dict[str, Any] | None:
+        """Run an incremental build and publish its change event.
+
+        Returns:
+            The published event, or ``None`` if nothing was rebuilt.
+        """
+        conf_py = path.join(self.srcdir, 'conf.py')
+        snapshot = self.scan()
+        conf_changed = snapshot.get(conf_py) != self._snapshot.get(conf_py)
+        # record the snapshot first, a broken tree is only retried after the next edit
+        self._snapshot = snapshot
+        if self.app is None or conf_changed:
+            # configuration changes need a fresh application
+            self.app = self.create_app()
+
+        previous_docs = set(self.app.env.found_docs)
+        self._written.clear()
+        started = time.perf_counter()
+        self.app.build()
+        elapsed = time.perf_counter() - started
+
+        removed = sorted(previous_docs - self.app.env.found_docs)
+        if not self._written and not removed:
+            return None
+
+        docnames = sorted(self._written)
+        section_docnames = getattr(self.app.builder, 'section_docnames', {})
+        sections: dict[str, list[str]] = {docname: [] for docname in docnames}
+        for hash_, docname in section_docnames.items():
+            if docname in sections:
+                sections[docname].append(hash_)
+
+        event = {
+            'docnames': docnames,
+            'removed': removed,
+            'sections': sections,
+            'duration': round(elapsed, 3),
+        }
+        self.publish(event)
+        return event
+
+    def changed(self) -> bool:
+        """Return whether the source tree changed since the last build."""
+        return self.scan() != self._snapshot
+
+    def subscribe(self) -> 'queue.Queue[str]':
+        """Register a new subscriber and return its event queue."""
+        subscriber: queue.Queue[str] = queue.Queue()
+        with self._lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: 'queue.Queue[str]') -> None:
+        """Remove a subscriber."""
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, event: dict[str, Any]) -> None:
+        """Send an event to all subscribers."""
+        data = json.dumps(event)
+        with self._lock:
+            for subscriber in self.subscribers:
+                subscriber.put(data)
+
+    def start_server(self) -> ThreadingHTTPServer:
+        """Start the server-sent events endpoint in a background thread."""
+        daemon = self
+
+        class EventHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] != '/events':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+
+                subscriber = daemon.subscribe()
+                try:
+                    while not daemon._stop.is_set():
+                        try:
+                            data = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                            message = f'event: change\ndata: {data}\n\n'
+                        except queue.Empty:
+                            message = ': keepalive\n\n'
+                        self.wfile.write(message.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    daemon.unsubscribe(subscriber)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), EventHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Publishing change events on http://{self.host}:{self._server.server_port}/events")
+        return self._server
+
+    def serve_forever(self) -> None:
+        """Build once, then rebuild whenever the source tree changes."""
+        self.start_server()
+        first = True
+        while first or not self._stop.wait(self.interval):
+            if not first and not self.changed():
+                continue
+            first = False
+            try:
+                self.build()
+            except Exception as e:
+                # keep watching, the next edit may fix the error
+                logger.warning(f"JSX watch build failed: {e}")
+
+    def shutdown(self) -> None:
+        """Stop watching and close the events endpoint."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.close_app()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the watch daemon from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='jsx-builder-watch',
+        description='Rebuild changed documents in a warm Sphinx environment '
+                    'and publish change events.')
+    parser.add_argument('srcdir')
+    parser.add_argument('outdir')
+    parser.add_argument('-b', '--builder', default='jjson')
+    parser.add_argument('-d', '--doctreedir', default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--interval', type=float, default=0.2)
+    parser.add_argument('-q', '--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    daemon = WatchDaemon(args.srcdir, args.outdir, doctreedir=args.doctreedir,
+                         buildername=args.builder, host=args.host, port=args.port,
+                         interval=args.interval, quiet=args.quiet)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Sphinx configuration for test site."""
+
+project = "Duplicates"
+extensions = ['jsx_builder']
+master_doc = "index"
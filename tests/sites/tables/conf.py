@@ -0,0 +1,5 @@
+"""Sphinx configuration for test site."""
+
+project = "Tables"
+extensions = ['jsx_builder']
+master_doc = "index"
@@ -1,6 +1,16 @@
 """Test the base html template and config."""
 
+import io
 import json
+import logging
+import os
+import shutil
+
+import pytest
+from sphinx.errors import ConfigError
+from sphinx.util.docutils import docutils_namespace
+
+from .conftest import path_tests
 
 COMMON_CONF_OVERRIDES = dict(
     navigation_with_keys=False,
@@ -59,3 +69,372 @@ def test_tutorial_jjson_jsx_body(sphinx_build_factory: any) -> None:
     
     # Check for JSX Section elements in the body
     assert '<SectionRef' in body, "No SectionRef elements found in body"
+
+
+def test_tutorial_jjson_section_index(sphinx_build_factory: any) -> None:
+    """Test that jjson builder emits linked section records and lookup indexes."""
+    sphinx_build = sphinx_build_factory("tutorial", buildername="jjson")
+    sphinx_build.build()
+
+    with open(sphinx_build.outdir / "headings.fjson", 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    sections = data['section_list']
+    index = data['section_index']
+
+    # Nested sections are linked to their parent by position
+    root = sections[index['roots'][0]]
+    assert root['parent'] is None
+    assert root['title'] == "Headings"
+    child = sections[index['by_id']['basic-usage']]
+    assert child['title'] == "Basic Usage"
+    assert sections[child['parent']] == root
+    assert index['by_id']['basic-usage'] in root['children']
+    for pos, section in enumerate(sections):
+        assert index['by_hash'][section['hash']] == pos
+
+    # Global index maps every section hash to its document
+    with open(sphinx_build.outdir / "sectionindex.json", 'r', encoding='utf-8') as f:
+        sectionindex = json.load(f)
+    for section in sections:
+        assert sectionindex[section['hash']] == "headings"
+
+    # Pages which are not documents carry no sections
+    for page in ("genindex.fjson", "search.fjson"):
+        with open(sphinx_build.outdir / page, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert 'section_list' not in data
+        assert 'section_index' not in data
+
+
+def test_tutorial_jjson_link_map(sphinx_build_factory: any) -> None:
+    """Test that jjson builder writes a link map and resolves internal links."""
+    sphinx_build = sphinx_build_factory("tutorial", buildername="jjson")
+    sphinx_build.build()
+
+    with open(sphinx_build.outdir / "linkmap.json", 'r', encoding='utf-8') as f:
+        linkmap = json.load(f)
+    with open(sphinx_build.outdir / "introduction.fjson", 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    assert linkmap['docs']['index'] == ""
+    assert linkmap['docs']['headings'] == "headings/"
+
+    # Every section anchor resolves to the section carrying it
+    for section in data['section_list']:
+        for anchor in section['id'].split():
+            assert linkmap['anchors'][f"introduction#{anchor}"] == section['hash']
+
+    # Internal links on the index page carry the resolved target
+    with open(sphinx_build.outdir / "index.fjson", 'r', encoding='utf-8') as f:
+        index_body = "".join(s['body'] for s in json.load(f)['section_list'])
+    assert '<Link to="headings/" doc="headings">' in index_body
+    assert 'doc="introduction" anchor="introduction#installation"' in index_body
+    assert ' target="' not in index_body
+
+
+def test_duplicates_jjson_section_hashes(sphinx_build_factory: any) -> None:
+    """Test that identical sections on one page and across pages get distinct hashes."""
+    sphinx_build = sphinx_build_factory("duplicates", buildername="jjson")
+    sphinx_build.build()
+
+    pages = {}
+    for docname in ("a", "b"):
+        with open(sphinx_build.outdir / f"{docname}.fjson", 'r', encoding='utf-8') as f:
+            pages[docname] = json.load(f)
+    with open(sphinx_build.outdir / "sectionindex.json", 'r', encoding='utf-8') as f:
+        sectionindex = json.load(f)
+    with open(sphinx_build.outdir / "linkmap.json", 'r', encoding='utf-8') as f:
+        linkmap = json.load(f)
+
+    hashes = [section['hash'] for page in pages.values() for section in page['section_list']]
+    assert len(hashes) == len(set(hashes)) == 8
+    for docname, page in pages.items():
+        assert len(page['section_index']['by_hash']) == len(page['section_list'])
+        for section in page['section_list']:
+            assert sectionindex[section['hash']] == docname
+
+    # "See also" of page b resolves to page b
+    see_also = pages["b"]['section_index']['by_id']['see-also']
+    assert linkmap['anchors']["b#see-also"] == pages["b"]['section_list'][see_also]['hash']
+
+
+def test_watch_rebuilds_changed_documents(tmp_path: any, capsys: any) -> None:
+    """Test that the watch daemon rebuilds and publishes only changed documents."""
+    from jsx_builder.watch import WatchDaemon
+
+    def edit(filepath: any, text: str) -> None:
+        filepath.write_text(text, "utf8")
+        mtime = filepath.stat().st_mtime + 10
+        os.utime(filepath, (mtime, mtime))
+
+    srcdir = tmp_path / "src"
+    shutil.copytree(path_tests / "sites" / "tutorial", srcdir)
+    daemon = WatchDaemon(str(srcdir), str(tmp_path / "out"), quiet=True)
+    subscriber = daemon.subscribe()
+
+    event = daemon.build()
+    assert "headings" in event['docnames']
+    assert json.loads(subscriber.get_nowait()) == event
+
+    # Nothing changed, nothing rebuilt
+    assert not daemon.changed()
+    assert daemon.build() is None
+
+    headings = srcdir / "headings.rst"
+    edit(headings, headings.read_text("utf8") + "\nAn added paragraph.\n")
+    assert daemon.changed()
+
+    event = daemon.build()
+    assert "headings" in event['docnames']
+    assert "paragraphs" not in event['docnames']
+    assert event['sections']['headings']
+    assert json.loads(subscriber.get_nowait()) == event
+
+    # Configuration changes recreate the application without re-registering nodes
+    conf_py = srcdir / "conf.py"
+    conf = conf_py.read_text("utf8")
+    edit(conf_py, conf + "extensions.append('sphinx.ext.todo')\n")
+    daemon.build()
+    edit(conf_py, conf + "extensions.append('sphinx.ext.todo')\nproject = 'Reloaded'\n")
+    daemon.build()
+    assert "already registered" not in capsys.readouterr().err
+
+    # A broken configuration is retried only after the next edit
+    edit(conf_py, conf + "extensions = [\n")
+    with pytest.raises(ConfigError):
+        daemon.build()
+    assert not daemon.changed()
+    edit(conf_py, conf)
+    assert daemon.changed()
+    assert daemon.build() is not None
+
+    daemon.shutdown()
+
+
+def test_render_single_document(tmp_path: any) -> None:
+    """Test that documents rendered on demand match the jjson build output."""
+    from sphinx.application import Sphinx
+
+    from jsx_builder.builders import SphinxJSONEncoder
+    from jsx_builder.render import DocumentRenderer
+
+    srcdir = tmp_path / "src"
+    outdir = tmp_path / "out"
+    doctreedir = tmp_path / "doctrees"
+    shutil.copytree(path_tests / "sites" / "tutorial", srcdir)
+    with docutils_namespace():
+        Sphinx(srcdir, srcdir, outdir, doctreedir, "jjson", status=None).build()
+
+    built = (outdir / "headings.fjson").stat().st_mtime_ns
+    renderer = DocumentRenderer(str(srcdir), str(outdir), doctreedir=str(doctreedir), maxsize=2)
+    ctx = renderer.render("headings")
+    with open(outdir / "headings.fjson", 'r', encoding='utf-8') as f:
+        assert json.loads(json.dumps(ctx, cls=SphinxJSONEncoder)) == json.load(f)
+    # Rendering does not touch the build output
+    assert (outdir / "headings.fjson").stat().st_mtime_ns == built
+
+    # Unchanged sources are served from the cache, callers get their own copy
+    ctx['request'] = "specific"
+    cached = renderer.render("headings")
+    assert (renderer.hits, renderer.misses) == (1, 1)
+    assert 'request' not in cached
+    assert cached['body'] is ctx['body']
+
+    # Edited sources are re-read and rendered again
+    headings = srcdir / "headings.rst"
+    headings.write_text(headings.read_text("utf8") + "\nAn added paragraph.\n", "utf8")
+    mtime = headings.stat().st_mtime + 10
+    os.utime(headings, (mtime, mtime))
+    ctx = renderer.render("headings")
+    assert renderer.misses == 2
+    assert "An added paragraph." in "".join(s['body'] for s in ctx['section_list'])
+
+    # The cache is bounded
+    renderer.render("paragraphs")
+    renderer.render("install")
+    assert len(renderer._cache) == 2
+
+    # Sub-microsecond edits count as outdated, as in Sphinx's own check
+    built = renderer.env.all_docs["install"]
+    os.utime(srcdir / "install.rst", ns=(built * 1000 + 1, built * 1000 + 1))
+    renderer.cache_clear()
+    renderer.render("install")
+    assert renderer.env.all_docs["install"] > built
+    renderer.close()
+
+def test_tutorial_jjson_chapter_bundles(sphinx_build_factory: any) -> None:
+    """Test that jjson builder groups chapter pages into size-limited bundles."""
+    sphinx_build = sphinx_build_factory(
+        "tutorial", buildername="jjson",
+        confoverrides={"jsx_chapter_bundles": True, "jsx_bundle_max_size": 1},
+    )
+    sphinx_build.build()
+
+    with open(sphinx_build.outdir / "bundles.json", 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    # Every top-level toctree entry is a chapter, the root and orphans are not bundled
+    assert set(manifest['docs']) == {"introduction", "table_of_contents", "headings", "paragraphs"}
+    for docname, name in manifest['docs'].items():
+        with open(sphinx_build.outdir / "_bundles" / f"{name}.json", 'r', encoding='utf-8') as f:
+            bundle = json.load(f)
+        with open(sphinx_build.outdir / f"{docname}.fjson", 'r', encoding='utf-8') as f:
+            assert bundle['pages'][docname] == json.load(f)
+        assert manifest['bundles'][name]['chapter'] == bundle['chapter']
+
+    # Part 2 of chapter "headings" and a chapter named "headings-2" get distinct bundles
+    builder = sphinx_build.app.builder
+    builder.get_chapters = lambda: {"headings": ["headings", "paragraphs"],
+                                    "headings-2": ["introduction"]}
+    builder.write_chapter_bundles()
+    with open(sphinx_build.outdir / "bundles.json", 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert len(manifest['bundles']) == 3
+    for docname, name in manifest['docs'].items():
+        with open(sphinx_build.outdir / "_bundles" / f"{name}.json", 'r', encoding='utf-8') as f:
+            assert docname in json.load(f)['pages']
+
+
+def test_tutorial_jjson_no_bundles_by_default(sphinx_build_factory: any) -> None:
+    """Test that chapter bundles are only written when enabled."""
+    sphinx_build = sphinx_build_factory("tutorial", buildername="jjson")
+    sphinx_build.build()
+
+    assert not (sphinx_build.outdir / "bundles.json").exists()
+
+
+def test_tutorial_jjson_deterministic(sphinx_build_factory: any) -> None:
+    """Test that deterministic mode gives identical, machine independent bytes."""
+    names = ["globalcontext.json", "sectionindex.json", "linkmap.json", "headings.fjson", "index.fjson"]
+    outputs = []
+    for _ in range(2):
+        sphinx_build = sphinx_build_factory(
+            "tutorial", buildername="jjson", confoverrides={"jsx_deterministic": True},
+        )
+        sphinx_build.build()
+        outputs.append({name: (sphinx_build.outdir / name).read_bytes() for name in names})
+        sphinx_build.app.cleanup()
+
+    assert outputs[0] == outputs[1]
+    for content in outputs[0].values():
+        assert str(sphinx_build.src).encode('utf-8') not in content
+
+    globalcontext = json.loads(outputs[0]["globalcontext.json"])
+    assert 'sphinx_version' not in globalcontext
+    assert list(globalcontext) == sorted(globalcontext)
+
+    data = json.loads(outputs[0]["headings.fjson"])
+    assert {section['source'] for section in data['section_list']} == {"headings.rst"}
+    assert 'source="headings.rst"' in data['section_list'][0]['body']
+
+
+def test_tutorial_jjson_compact(sphinx_build_factory: any) -> None:
+    """Test that compact mode interns section sources and shrinks the pages."""
+    sizes = {}
+    for compact in (False, True):
+        sphinx_build = sphinx_build_factory(
+            "tutorial", buildername="jjson", confoverrides={"jsx_compact": compact},
+        )
+        sphinx_build.build()
+        sizes[compact] = sum(page.stat().st_size for page in sphinx_build.outdir.glob("*.fjson"))
+        sphinx_build.app.cleanup()
+
+    assert sizes[True] < sizes[False]
+
+    with open(sphinx_build.outdir / "headings.fjson", 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['section_sources'] == [str(sphinx_build.src / "headings.rst")]
+    for section in data['section_list']:
+        assert section['source'] == 0
+        assert section['body'].startswith(f'<Section hash="{section["hash"]}">')
+    # Code blocks keep their line breaks
+    assert 'Level 1 Heading\n=====' in data['section_list'][0]['body']
+
+
+def test_tables_jjson_table_markup(sphinx_build_factory: any) -> None:
+    """Test that tables are rendered with the JSX table components."""
+    sphinx_build = sphinx_build_factory("tables", buildername="jjson")
+    sphinx_build.build()
+
+    with open(sphinx_build.outdir / "index.fjson", 'r', encoding='utf-8') as f:
+        body = json.load(f)['section_list'][0]['body']
+
+    assert '<Table className="prices" ' in body
+    assert '<TableRow><TableCell className="header-cell" isHeader="true">' in body
+    assert body.count('isHeader="true"') == 2
+    assert body.count('<TableCell>') == 4
+    assert '<Link to="#tables" doc="index" anchor="index#tables">' in body
+
+
+class RecordingImplementation:
+    """Output implementation recording the calls it receives."""
+
+    def __init__(self: object) -> None:
+        """Initialize the recorded calls."""
+        self.calls = []
+
+    def createPage(self: object, obj: any, *args: any, **kwds: any) -> None:  # noqa: N802
+        """Record a page."""
+        self.calls.append(('createPage', obj, kwds))
+
+    def finalize(self: object, obj: any, *args: any, **kwds: any) -> None:
+        """Record the finalization."""
+        self.calls.append(('finalize', obj, kwds))
+
+
+def test_batch_build_shared_implementation(tmp_path: any, caplog: any) -> None:
+    """Test that batch jobs feed one shared implementation keyed by docId."""
+    from jsx_builder.batch import run_batch
+
+    implementation = RecordingImplementation()
+    jobs = [(str(path_tests / "sites" / "base"), 1), (str(path_tests / "sites" / "tutorial"), 2)]
+    with caplog.at_level(logging.INFO, logger="jsx_builder.batch"):
+        results = run_batch(jobs, str(tmp_path), implementation, max_workers=2)
+
+    assert [result.doc_id for result in results] == [1, 2]
+    for result in results:
+        assert result.ok, result.error
+        assert result.duration > 0
+    assert (tmp_path / "1" / "index.fjson").exists()
+    assert (tmp_path / "2" / "headings.fjson").exists()
+
+    pages = {(kwds['docId'], obj['current_page_name'])
+             for method, obj, kwds in implementation.calls if method == 'createPage'}
+    assert (1, "index") in pages
+    assert (2, "headings") in pages
+    assert (1, "headings") not in pages
+    finalized = [kwds['docId'] for method, _obj, kwds in implementation.calls if method == 'finalize']
+    assert sorted(finalized) == [1, 2]
+    # Pages of a project are replayed before its finalization
+    for doc_id in (1, 2):
+        calls = [method for method, _obj, kwds in implementation.calls if kwds['docId'] == doc_id]
+        assert calls[-1] == 'finalize'
+
+    # The time per project is logged
+    assert sum("(docId" in message for message in caplog.messages) == 2
+
+    # Jobs sharing an output directory are rejected before anything is built
+    with pytest.raises(ValueError, match="both build into"):
+        run_batch([jobs[0], (jobs[1][0], 1)], str(tmp_path / "dup"))
+    assert not (tmp_path / "dup").exists()
+
+
+BATCH_IMPLEMENTATION = RecordingImplementation()
+
+
+def test_batch_command_implementation(tmp_path: any) -> None:
+    """Test that the batch command feeds the implementation given on the command line."""
+    from jsx_builder.batch import main
+
+    BATCH_IMPLEMENTATION.calls.clear()
+    stdout = io.StringIO()
+    argv = [str(tmp_path), "--job", str(path_tests / "sites" / "base"), "base",
+            "--implementation", f"{__name__}:BATCH_IMPLEMENTATION"]
+    assert main(argv, stdout) == 0
+
+    assert ('finalize', 'base') in {(method, kwds['docId'])
+                                     for method, _obj, kwds in BATCH_IMPLEMENTATION.calls}
+    report = stdout.getvalue().splitlines()
+    assert report[0].startswith("base\t")
+    assert report[-1].startswith("total\t")